@@ -12,6 +12,8 @@ from Thunder.bot import StreamBot
 from Thunder.vars import Var
 from Thunder.server import web_server
 from Thunder.utils.keepalive import ping_server
+from Thunder.utils.background import spawn
+from Thunder.utils.database import Database
 from Thunder.bot.clients import initialize_clients
 from Thunder.utils.logger import logger
 
@@ -56,9 +58,13 @@ async def start_services():
             logger.error("Failed to import plugin %s: %s", plugin_name, e)
     logger.info("------------------ Plugin Importing Completed ------------------")
 
+    logger.info("\n================= Preparing Database Indexes =================")
+    await Database(Var.DATABASE_URL, Var.NAME).ensure_indexes()
+    logger.info("------------------ Database Indexes Ready ------------------")
+
     if Var.ON_HEROKU:
         logger.info("\n================= Starting Keep-Alive Service =================")
-        asyncio.create_task(ping_server())
+        spawn(ping_server(), daemon=True)
         logger.info("----------------- Keep-Alive Service Started -----------------")
 
     logger.info("\n================= Initializing Web Server =================")
@@ -30,6 +30,8 @@ from Thunder.utils.human_readable import humanbytes
 from Thunder.utils.time_format import get_readable_time
 from Thunder.utils.database import Database
 from Thunder.utils.logger import logger, LOG_FILE
+from Thunder.utils.ratelimit import TokenBucket
+from Thunder.utils.background import drain_background_tasks
 
 # ==============================
 # Database Initialization
@@ -41,6 +43,9 @@ db = Database(Var.DATABASE_URL, Var.NAME)
 # Dictionary to keep track of active broadcasts by their unique IDs
 broadcast_ids: Dict[str, any] = {}
 
+# Shared pacing for broadcast sends, kept under Telegram's ~30 messages/second bot limit
+broadcast_bucket = TokenBucket(rate=28, burst=20)
+
 # ==============================
 # Helper Functions
 # ==============================
@@ -154,8 +159,7 @@ async def log_new_user(bot: Client, user_id: int, first_name: str):
         first_name (str): The first name of the user.
     """
     try:
-        if not await db.is_user_exist(user_id):
-            await db.add_user(user_id)
+        if await db.add_user(user_id):
             try:
                 if hasattr(Var, 'BIN_CHANNEL') and isinstance(Var.BIN_CHANNEL, int) and Var.BIN_CHANNEL != 0:
                     await bot.send_message(
@@ -183,7 +187,6 @@ async def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
                                    media name, and media size.
     """
     try:
-        base_url = Var.URL.rstrip("/")
         file_id = log_msg.id
         # Ensure file_name is a string
         media_name = get_name(log_msg)
@@ -194,8 +197,8 @@ async def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
         media_size = humanbytes(get_media_file_size(log_msg))
         file_name_encoded = quote_plus(media_name)
         hash_value = get_hash(log_msg)
-        stream_link = f"{base_url}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
-        online_link = f"{base_url}/{file_id}/{file_name_encoded}?hash={hash_value}"
+        stream_link = f"{Var.BASE_URL}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
+        online_link = f"{Var.BASE_URL}/{file_id}/{file_name_encoded}?hash={hash_value}"
         logger.info(f"Generated media links for file_id {file_id}")
         return stream_link, online_link, media_name, media_size
     except Exception as e:
@@ -376,10 +379,6 @@ async def broadcast_message(client: Client, message: Message):
         # Semaphore to limit the number of concurrent tasks
         semaphore = asyncio.Semaphore(10)  # Adjust concurrency level as needed
 
-        # Locks to safely update shared counters across asynchronous tasks
-        successes_lock = asyncio.Lock()
-        failures_lock = asyncio.Lock()
-
         async def send_message_to_user(user_id: int):
             """
             Send the broadcast message to a single user with retry logic.
@@ -395,6 +394,8 @@ async def broadcast_message(client: Client, message: Message):
             async with semaphore:
                 for attempt in range(3):  # Retry up to 3 times
                     try:
+                        # Wait for a send slot so the broadcast stays under the flood limit
+                        await broadcast_bucket.acquire()
                         # Determine the type of content to send based on the replied message
                         if message.reply_to_message.text or message.reply_to_message.caption:
                             # Send text or caption content
@@ -408,9 +409,8 @@ async def broadcast_message(client: Client, message: Message):
                             # Copy media content directly
                             await message.reply_to_message.copy(chat_id=user_id)
 
-                        # Safely increment the success counter
-                        async with successes_lock:
-                            successes += 1
+                        # Counters are only touched between awaits, so no lock is needed
+                        successes += 1
                         break  # Exit the retry loop on success
 
                     except FloodWait as e:
@@ -425,9 +425,7 @@ async def broadcast_message(client: Client, message: Message):
                         # If the user is not found, remove them from the database
                         if "user" in str(e).lower() and "not found" in str(e).lower():
                             await db.delete_user(user_id)
-                        # Safely increment the failure counter
-                        async with failures_lock:
-                            failures += 1
+                        failures += 1
                         # Wait before retrying to prevent rapid retries
                         await asyncio.sleep(0.5)  # Adjust delay as needed
 
@@ -577,8 +575,8 @@ async def restart_bot(client: Client, message: Message):
         # Log the restart action
         logger.info("Bot is restarting as per owner's request.")
 
-        # Wait briefly to ensure the notification message is sent
-        await asyncio.sleep(2)
+        # execv kills the process outright, so let pending background writes finish first
+        await drain_background_tasks()
 
         # Restart the bot by replacing the current process
         os.execv(sys.executable, [sys.executable, "-m", "Thunder"])
@@ -1,12 +1,11 @@
 # Thunder/bot/plugins/common.py
 
-import time
 import asyncio
-from typing import Tuple
-from urllib.parse import quote_plus
+from typing import Dict, Tuple, Union
+
+from cachetools import TTLCache
 
 from pyrogram import Client, filters
-from pyrogram.errors import RPCError
 from pyrogram.types import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -16,10 +15,12 @@ from pyrogram.types import (
 
 from Thunder.bot import StreamBot
 from Thunder.vars import Var
+from Thunder.utils.background import spawn
 from Thunder.utils.database import Database
 from Thunder.utils.human_readable import humanbytes
-from Thunder.utils.file_properties import get_hash, get_media_file_size, get_name
+from Thunder.utils.file_properties import get_media_from_message, quote_file_name
 from Thunder.utils.logger import logger
+from Thunder.utils.messages import LINKS_READY_MSG
 
 # ==============================
 # Database Initialization
@@ -42,6 +43,49 @@ FAILED_USER_INFO_MSG = (
 )
 REPLY_DOES_NOT_CONTAIN_USER_MSG = "❌ **The replied message does not contain a user.**"
 
+WELCOME_MSG = (
+    "👋 **Welcome to the File to Link Bot!**\n\n"
+    "I'm here to help you generate direct download and streaming links for your files.\n"
+    "Simply send me any file, and I'll provide you with links to share with others.\n\n"
+    "🔹 **Available Commands:**\n"
+    "/help - How to use the bot\n"
+    "/about - About the bot\n"
+    "/ping - Check bot's response time\n\n"
+    "Enjoy using the bot, and feel free to share your feedback!"
+)
+
+HELP_MSG = (
+    "ℹ️ **How to Use the File to Link Bot**\n\n"
+    "🔹 **Generate Links:** Send me any file, and I'll provide you with direct download and streaming links.\n"
+    "🔹 **In Groups:** Use `/link` command as per group settings.\n"
+    "🔹 **In Channels:** Add me to your channel, and I'll automatically generate links for new posts.\n\n"
+    "🔸 **Additional Commands:**\n"
+    "/about - Learn more about the bot\n"
+    "/ping - Check the bot's response time\n\n"
+    "If you have any questions or need support, feel free to reach out!"
+)
+
+ABOUT_MSG = (
+    "🤖 **About the File to Link Bot**\n\n"
+    "This bot helps you generate direct download and streaming links for any file.\n\n"
+    "🔹 **Features:**\n"
+    " - Generate direct links for files\n"
+    " - Support for all file types\n"
+    " - Easy to use in private chats and groups\n\n"
+    "Feel free to reach out if you have any questions or suggestions!"
+)
+
+# ==============================
+# Caches
+# ==============================
+
+# Resolved users for /dc lookups, kept for 5 minutes
+user_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+# Per-query locks so concurrent lookups of the same user share a single RPC
+user_cache_locks: Dict[Union[int, str], asyncio.Lock] = {}
+# In-flight BIN_CHANNEL message fetches, keyed by message ID
+bin_message_inflight: Dict[int, asyncio.Task] = {}
+
 # ==============================
 # Helper Functions
 # ==============================
@@ -83,8 +127,7 @@ async def log_new_user(bot: Client, user_id: int, first_name: str):
         first_name (str): The first name of the user.
     """
     try:
-        if not await db.is_user_exist(user_id):
-            await db.add_user(user_id)
+        if await db.add_user(user_id):
             try:
                 if hasattr(Var, 'BIN_CHANNEL') and isinstance(Var.BIN_CHANNEL, int) and Var.BIN_CHANNEL != 0:
                     await bot.send_message(
@@ -94,13 +137,13 @@ async def log_new_user(bot: Client, user_id: int, first_name: str):
                         f"🆔 **User ID:** `{user_id}`\n\n"
                         "has started the bot!"
                     )
-                logger.info(f"New user added: {user_id} - {first_name}")
+                logger.info("New user added: %s - %s", user_id, first_name)
             except Exception as e:
                 logger.error(f"Failed to send new user alert to BIN_CHANNEL: {e}", exc_info=True)
     except Exception as e:
         logger.error(f"Error logging new user {user_id}: {e}", exc_info=True)
 
-async def generate_media_links(log_msg: Message) -> Tuple[str, str]:
+def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
     """
     Generate stream and download links for media.
 
@@ -108,30 +151,82 @@ async def generate_media_links(log_msg: Message) -> Tuple[str, str]:
         log_msg (Message): The message containing the media.
 
     Returns:
-        Tuple[str, str]: A tuple containing the stream link and the download link.
+        Tuple[str, str, str, str]: A tuple containing the stream link, the download link,
+                                   the file name and the file size.
     """
     try:
-        base_url = Var.URL.rstrip("/")
         file_id = log_msg.id
+        # Locate the media once and read name, size and hash from it
+        media = get_media_from_message(log_msg)
 
         # Ensure file_name is a string
-        file_name = get_name(log_msg)
+        file_name = getattr(media, "file_name", "")
         if isinstance(file_name, bytes):
             file_name = file_name.decode('utf-8', errors='replace')
         else:
             file_name = str(file_name)
-        file_name_encoded = quote_plus(file_name)
-
-        hash_value = get_hash(log_msg)
-        stream_link = f"{base_url}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
-        online_link = f"{base_url}/{file_id}/{file_name_encoded}?hash={hash_value}"
-        logger.info(f"Generated media links for file_id {file_id}")
-        return stream_link, online_link
+        file_name_encoded = quote_file_name(file_name, plus=True)
+        file_size = humanbytes(getattr(media, "file_size", 0))
+
+        hash_value = getattr(media, "file_unique_id", "")[:6]
+        stream_link = f"{Var.BASE_URL}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
+        online_link = f"{Var.BASE_URL}/{file_id}/{file_name_encoded}?hash={hash_value}"
+        logger.info("Generated media links for file_id %s", file_id)
+        return stream_link, online_link, file_name, file_size
     except Exception as e:
         logger.error(f"Error generating media links: {e}", exc_info=True)
-        await notify_channel(log_msg._client, f"Error generating media links: {e}")
+        spawn(notify_channel(log_msg._client, f"Error generating media links: {e}"))
         raise
 
+async def get_user_cached(bot: Client, query: Union[int, str]) -> User:
+    """
+    Resolve a user by ID or username, serving repeated lookups from a TTL cache.
+
+    Concurrent lookups for the same query are coalesced into a single get_users call.
+
+    Args:
+        bot (Client): The Pyrogram client instance.
+        query (Union[int, str]): The user ID or @username to resolve.
+
+    Returns:
+        User: The resolved user object.
+    """
+    key = query.lower() if isinstance(query, str) else query
+    user = user_cache.get(key)
+    if user is not None:
+        return user
+
+    lock = user_cache_locks.setdefault(key, asyncio.Lock())
+    try:
+        async with lock:
+            user = user_cache.get(key)
+            if user is None:
+                user = await bot.get_users(query)
+                user_cache[key] = user
+        return user
+    finally:
+        if not lock.locked():
+            user_cache_locks.pop(key, None)
+
+async def get_bin_message(bot: Client, msg_id: int) -> Message:
+    """
+    Fetch a message from the BIN_CHANNEL, sharing one request between concurrent callers.
+
+    Args:
+        bot (Client): The Pyrogram client instance.
+        msg_id (int): The message ID in the BIN_CHANNEL.
+
+    Returns:
+        Message: The fetched message.
+    """
+    task = bin_message_inflight.get(msg_id)
+    if task is None:
+        task = asyncio.ensure_future(bot.get_messages(chat_id=Var.BIN_CHANNEL, message_ids=msg_id))
+        bin_message_inflight[msg_id] = task
+        task.add_done_callback(lambda _: bin_message_inflight.pop(msg_id, None))
+    # Shield the shared fetch so one cancelled caller does not cancel it for the others
+    return await asyncio.shield(task)
+
 async def generate_dc_text(user: User) -> str:
     """
     Generate formatted DC (Data Center) information text for a user.
@@ -151,6 +246,20 @@ async def generate_dc_text(user: User) -> str:
         "This is the data center where the specified user is hosted."
     )
 
+async def send_dc_info(message: Message, user: User):
+    """
+    Reply with a user's Data Center information and a button to view their profile.
+
+    Args:
+        message (Message): The message to reply to.
+        user (User): The user whose DC information is sent.
+    """
+    dc_text = await generate_dc_text(user)
+    dc_keyboard = InlineKeyboardMarkup([
+        [InlineKeyboardButton("🔍 View Profile", url=f"tg://user?id={user.id}")]
+    ])
+    await message.reply_text(dc_text, disable_web_page_preview=True, reply_markup=dc_keyboard, quote=True)
+
 # ==============================
 # Command Handlers
 # ==============================
@@ -166,44 +275,32 @@ async def start_command(bot: Client, message: Message):
     """
     try:
         if message.from_user:
-            await log_new_user(bot, message.from_user.id, message.from_user.first_name)
-        args = message.text.strip().split("_", 1)
+            spawn(log_new_user(bot, message.from_user.id, message.from_user.first_name))
+        # The command filter has already split the text; the deep-link payload looks like "file_123"
+        payload = message.command[1] if len(message.command) > 1 else ""
+        args = payload.split("_", 1)
 
         if len(args) == 1 or args[-1].lower() == "start":
             # Welcome message when no arguments are provided
-            welcome_text = (
-                "👋 **Welcome to the File to Link Bot!**\n\n"
-                "I'm here to help you generate direct download and streaming links for your files.\n"
-                "Simply send me any file, and I'll provide you with links to share with others.\n\n"
-                "🔹 **Available Commands:**\n"
-                "/help - How to use the bot\n"
-                "/about - About the bot\n"
-                "/ping - Check bot's response time\n\n"
-                "Enjoy using the bot, and feel free to share your feedback!"
-            )
-            await message.reply_text(text=welcome_text)
-            logger.info(f"Sent welcome message to user {message.from_user.id}")
+            await message.reply_text(text=WELCOME_MSG)
+            logger.info("Sent welcome message to user %s", message.from_user.id)
         else:
             # Handling the case when a file ID is provided
             try:
                 msg_id = int(args[-1])
-                get_msg = await bot.get_messages(chat_id=Var.BIN_CHANNEL, message_ids=msg_id)
+                get_msg = await get_bin_message(bot, msg_id)
                 if not get_msg:
                     raise ValueError("Message not found")
-                file_name = get_name(get_msg)
+                stream_link, online_link, file_name, file_size = generate_media_links(get_msg)
                 if not file_name:
                     file_name = "Unknown File"
-                file_size = humanbytes(get_media_file_size(get_msg))
-                stream_link, online_link = await generate_media_links(get_msg)
 
                 await message.reply_text(
-                    text=(
-                        f"🔗 **Your Links are Ready!**\n\n"
-                        f"📄 **File Name:** `{file_name}`\n\n"
-                        f"📂 **File Size:** `{file_size}`\n\n"
-                        f"📥 **Download Link:**\n`{online_link}`\n\n"
-                        f"🖥️ **Watch Now:**\n`{stream_link}`\n\n"
-                        "⏰ **Note:** Links are available as long as the bot is active."
+                    text=LINKS_READY_MSG.format(
+                        media_name=file_name,
+                        media_size=file_size,
+                        online_link=online_link,
+                        stream_link=stream_link
                     ),
                     disable_web_page_preview=True,
                     reply_markup=InlineKeyboardMarkup([
@@ -213,10 +310,10 @@ async def start_command(bot: Client, message: Message):
                         ]
                     ])
                 )
-                logger.info(f"Provided links to user {message.from_user.id} for file_id {msg_id}")
+                logger.info("Provided links to user %s for file_id %s", message.from_user.id, msg_id)
             except ValueError:
                 await handle_user_error(message, "❌ **Invalid file identifier provided.**")
-                logger.warning(f"Invalid file ID provided by user {message.from_user.id}")
+                logger.warning("Invalid file ID provided by user %s", message.from_user.id)
             except Exception as e:
                 await handle_user_error(message, "❌ **Failed to retrieve file information.**")
                 logger.error(f"Failed to retrieve file info for message ID {args[-1]}: {e}", exc_info=True)
@@ -236,19 +333,9 @@ async def help_command(bot: Client, message: Message):
     """
     try:
         if message.from_user:
-            await log_new_user(bot, message.from_user.id, message.from_user.first_name)
-        help_text = (
-            "ℹ️ **How to Use the File to Link Bot**\n\n"
-            "🔹 **Generate Links:** Send me any file, and I'll provide you with direct download and streaming links.\n"
-            "🔹 **In Groups:** Use `/link` command as per group settings.\n"
-            "🔹 **In Channels:** Add me to your channel, and I'll automatically generate links for new posts.\n\n"
-            "🔸 **Additional Commands:**\n"
-            "/about - Learn more about the bot\n"
-            "/ping - Check the bot's response time\n\n"
-            "If you have any questions or need support, feel free to reach out!"
-        )
-        await message.reply_text(text=help_text, disable_web_page_preview=True)
-        logger.info(f"Sent help message to user {message.from_user.id}")
+            spawn(log_new_user(bot, message.from_user.id, message.from_user.first_name))
+        await message.reply_text(text=HELP_MSG, disable_web_page_preview=True)
+        logger.info("Sent help message to user %s", message.from_user.id)
     except Exception as e:
         logger.error(f"Error in help_command: {e}", exc_info=True)
         await handle_user_error(message, "🚨 **An unexpected error occurred.**")
@@ -265,18 +352,9 @@ async def about_command(bot: Client, message: Message):
     """
     try:
         if message.from_user:
-            await log_new_user(bot, message.from_user.id, message.from_user.first_name)
-        about_text = (
-            "🤖 **About the File to Link Bot**\n\n"
-            "This bot helps you generate direct download and streaming links for any file.\n\n"
-            "🔹 **Features:**\n"
-            " - Generate direct links for files\n"
-            " - Support for all file types\n"
-            " - Easy to use in private chats and groups\n\n"
-            "Feel free to reach out if you have any questions or suggestions!"
-        )
-        await message.reply_text(text=about_text, disable_web_page_preview=True)
-        logger.info(f"Sent about message to user {message.from_user.id}")
+            spawn(log_new_user(bot, message.from_user.id, message.from_user.first_name))
+        await message.reply_text(text=ABOUT_MSG, disable_web_page_preview=True)
+        logger.info("Sent about message to user %s", message.from_user.id)
     except Exception as e:
         logger.error(f"Error in about_command: {e}", exc_info=True)
         await handle_user_error(message, "🚨 **An unexpected error occurred.**")
@@ -292,32 +370,23 @@ async def dc_command(bot: Client, message: Message):
         message (Message): The incoming message triggering the command.
     """
     try:
-        # Log the user
+        # Log the user in the background
         if message.from_user:
-            await log_new_user(bot, message.from_user.id, message.from_user.first_name)
+            spawn(log_new_user(bot, message.from_user.id, message.from_user.first_name))
 
-        # Extract arguments
-        args = message.text.strip().split(maxsplit=1)
+        # Arguments as already parsed by the command filter
+        args = message.command
 
         if len(args) > 1:
-            query = args[1].strip()
+            query = args[1]
 
             if query.startswith('@'):
                 # Handle username
                 username = query
                 try:
-                    user = await bot.get_users(username)
-                    dc_text = await generate_dc_text(user)
-
-                    dc_keyboard = InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔍 View Profile", url=f"tg://user?id={user.id}")]
-                    ])
-
-                    await message.reply_text(dc_text, disable_web_page_preview=True, reply_markup=dc_keyboard, quote=True)
-                    logger.info(f"Provided DC info for username {username}")
-                except RPCError as e:
-                    await handle_user_error(message, FAILED_USER_INFO_MSG)
-                    logger.error(f"Failed to get user info for username {username}: {e}", exc_info=True)
+                    user = await get_user_cached(bot, username)
+                    await send_dc_info(message, user)
+                    logger.info("Provided DC info for username %s", username)
                 except Exception as e:
                     await handle_user_error(message, FAILED_USER_INFO_MSG)
                     logger.error(f"Failed to get user info for username {username}: {e}", exc_info=True)
@@ -327,49 +396,30 @@ async def dc_command(bot: Client, message: Message):
                 # Handle TGID (Telegram User ID)
                 user_id_arg = int(query)
                 try:
-                    user = await bot.get_users(user_id_arg)
-                    dc_text = await generate_dc_text(user)
-
-                    dc_keyboard = InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔍 View Profile", url=f"tg://user?id={user.id}")]
-                    ])
-
-                    await message.reply_text(dc_text, disable_web_page_preview=True, reply_markup=dc_keyboard, quote=True)
-                    logger.info(f"Provided DC info for user ID {user_id_arg}")
-                except RPCError as e:
-                    await handle_user_error(message, FAILED_USER_INFO_MSG)
-                    logger.error(f"Failed to get user info for user ID {user_id_arg}: {e}", exc_info=True)
+                    user = await get_user_cached(bot, user_id_arg)
+                    await send_dc_info(message, user)
+                    logger.info("Provided DC info for user ID %s", user_id_arg)
                 except Exception as e:
                     await handle_user_error(message, FAILED_USER_INFO_MSG)
                     logger.error(f"Failed to get user info for user ID {user_id_arg}: {e}", exc_info=True)
                 return
             else:
                 await handle_user_error(message, INVALID_ARG_MSG)
-                logger.warning(f"Invalid argument provided in /dc command: {query}")
+                logger.warning("Invalid argument provided in /dc command: %s", query)
                 return
 
         # Check if the command is a reply to a message
         if message.reply_to_message and message.reply_to_message.from_user:
             user = message.reply_to_message.from_user
-            dc_text = await generate_dc_text(user)
-            dc_keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔍 View Profile", url=f"tg://user?id={user.id}")]
-            ])
-            await message.reply_text(dc_text, disable_web_page_preview=True, reply_markup=dc_keyboard, quote=True)
-            logger.info(f"Provided DC info for replied user {user.id}")
+            await send_dc_info(message, user)
+            logger.info("Provided DC info for replied user %s", user.id)
             return
 
         # Default case: No arguments and not a reply, return the DC of the command issuer
         if message.from_user:
             user = message.from_user
-            dc_text = await generate_dc_text(user)
-
-            dc_keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("🔍 View Profile", url=f"tg://user?id={user.id}")]
-            ])
-
-            await message.reply_text(dc_text, disable_web_page_preview=True, reply_markup=dc_keyboard, quote=True)
-            logger.info(f"Provided DC info for user {user.id}")
+            await send_dc_info(message, user)
+            logger.info("Provided DC info for user %s", user.id)
         else:
             await handle_user_error(message, "❌ **Unable to retrieve your information.**")
             logger.warning("Failed to retrieve information for the command issuer in /dc command.")
@@ -388,12 +438,14 @@ async def ping_command(bot: Client, message: Message):
         message (Message): The incoming message triggering the command.
     """
     try:
-        start_time = time.time()
+        # Use the loop's monotonic clock so the measurement is immune to wall-clock adjustments
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
         response = await message.reply_text("🏓 Pong!")
-        end_time = time.time()
+        end_time = loop.time()
         time_taken_ms = (end_time - start_time) * 1000
         await response.edit(f"🏓 **Pong!**\n⏱ **Response Time:** `{time_taken_ms:.3f} ms`")
-        logger.info(f"Ping command executed by user {message.from_user.id} in {time_taken_ms:.3f} ms")
+        logger.info("Ping command executed by user %s in %.3f ms", message.from_user.id, time_taken_ms)
     except Exception as e:
         logger.error(f"Error in ping_command: {e}", exc_info=True)
         await handle_user_error(message, "🚨 **An unexpected error occurred.**")
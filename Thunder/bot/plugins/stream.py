@@ -1,9 +1,12 @@
 # Thunder/bot/plugins/stream.py
 
 import time
+import random
 import asyncio
-from urllib.parse import quote
-from typing import Optional, Tuple, Dict, Union, List
+from collections import OrderedDict
+from typing import Optional, Tuple, Dict, Union, List, NamedTuple, Set
+
+from cachetools import TTLCache
 
 from pyrogram import Client, filters, enums
 from pyrogram.errors import FloodWait, RPCError
@@ -16,10 +19,12 @@ from pyrogram.types import (
 )
 
 from Thunder.bot import StreamBot
+from Thunder.utils.background import spawn
 from Thunder.utils.database import Database
-from Thunder.utils.file_properties import get_hash, get_media_file_size, get_name
+from Thunder.utils.file_properties import get_media_from_message, quote_file_name
 from Thunder.utils.human_readable import humanbytes
 from Thunder.utils.logger import logger
+from Thunder.utils.messages import LINKS_READY_MSG
 from Thunder.vars import Var
 
 # ==============================
@@ -28,26 +33,93 @@ from Thunder.vars import Var
 
 db: Database = Database(Var.DATABASE_URL, Var.NAME)
 
+# ==============================
+# Constants and Messages
+# ==============================
+
+# BIN_CHANNEL if one is configured, otherwise None
+BIN_CHANNEL: Optional[int] = (
+    Var.BIN_CHANNEL
+    if hasattr(Var, 'BIN_CHANNEL') and isinstance(Var.BIN_CHANNEL, int) and Var.BIN_CHANNEL != 0
+    else None
+)
+
+# Recipients of owner notifications: the owners plus BIN_CHANNEL, without duplicates
+NOTIFY_CHAT_IDS: Tuple[int, ...] = tuple(
+    set(Var.OWNER_ID if isinstance(Var.OWNER_ID, (list, tuple, set)) else {Var.OWNER_ID})
+    | ({BIN_CHANNEL} if BIN_CHANNEL is not None else set())
+)
+
+# Telegram rejects messages longer than this many characters
+MAX_MESSAGE_LENGTH: int = 4096
+
+REQUEST_LOG_MSG = (
+    "👤 **Requested by:** [{first_name}](tg://user?id={user_id})\n"
+    "🆔 **User ID:** `{user_id}`\n\n"
+    "📥 **Download Link:** `{online_link}`\n"
+    "🖥️ **Watch Now Link:** `{stream_link}`"
+)
+
 # ==============================
 # Cache Configurations
 # ==============================
 
-CACHE: Dict[str, Dict[str, Union[str, float]]] = {}
+class CacheEntry(NamedTuple):
+    """Links generated for a file, cached by its file_unique_id."""
+    media_name: str
+    media_size: str
+    stream_link: str
+    online_link: str
+    expires_at: float
+
+
+# LRU of generated links; entries keep the fixed expiry they were cached with
+CACHE: "OrderedDict[str, CacheEntry]" = OrderedDict()
 CACHE_EXPIRY: int = 86400  # 24 hours
+CACHE_MAX_SIZE: int = 10000
+
+# Whether copying (rather than forwarding) media to BIN_CHANNEL works, keyed by source chat ID
+COPY_PREFERRED: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+# Chats where the bot is known to be an admin; only positive results are cached,
+# so a newly promoted bot is recognized on the next check
+ADMIN_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# Channels where the bot is known to be allowed to edit posts; positive results only
+EDIT_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# Users known to be registered, so /link can skip the database lookup
+KNOWN_USERS: Set[int] = set()
+
+# In-flight link generations keyed by file_unique_id, shared by concurrent requests
+INFLIGHT: Dict[str, asyncio.Task] = {}
+
+# ==============================
+# Rate Limiting
+# ==============================
+
+# Caps copies/forwards to BIN_CHANNEL in flight across all handlers
+FORWARD_SEMAPHORE: asyncio.Semaphore = asyncio.Semaphore(4)
 
 # ==============================
 # Helper Functions
 # ==============================
 
-async def handle_flood_wait(e: FloodWait) -> None:
+async def handle_flood_wait(e: FloodWait, retry: int = 0) -> None:
     """
-    Handles FloodWait exceptions by logging a warning and sleeping for the required duration.
+    Handles FloodWait exceptions by logging a warning and sleeping for the required duration,
+    backing off exponentially with jitter on repeated retries.
 
     Args:
         e (FloodWait): The FloodWait exception containing the wait duration.
+        retry (int): The number of retries already made for this call.
     """
-    logger.warning(f"FloodWait encountered. Sleeping for {e.value} seconds.")
-    await asyncio.sleep(e.value + 1)
+    base: float = max(e.value, min(2 ** retry, 60))
+    # Never sleep less than Telegram asked for; a few seconds of jitter spreads out
+    # concurrent retries without stretching long waits
+    delay: float = base + random.uniform(0, min(0.5 * base, 5))
+    logger.warning("FloodWait encountered. Sleeping for %.1f seconds.", delay)
+    await asyncio.sleep(delay)
 
 
 async def notify_owner(client: Client, text: str) -> None:
@@ -58,24 +130,41 @@ async def notify_owner(client: Client, text: str) -> None:
         client (Client): The Pyrogram client instance.
         text (str): The notification message to send.
     """
-    try:
-        owner_ids = Var.OWNER_ID
-        if isinstance(owner_ids, (list, tuple, set)):
-            tasks = [
-                client.send_message(chat_id=owner_id, text=text)
-                for owner_id in owner_ids
-            ]
-            await asyncio.gather(*tasks)
-        else:
-            await client.send_message(chat_id=owner_ids, text=text)
-        
-        if hasattr(Var, 'BIN_CHANNEL') and isinstance(Var.BIN_CHANNEL, int) and Var.BIN_CHANNEL != 0:
-            await client.send_message(chat_id=Var.BIN_CHANNEL, text=text)
-    except Exception as e:
-        logger.error(
-            f"Failed to send message to owner or BIN_CHANNEL: {e}",
-            exc_info=True
-        )
+    sends = [client.send_message(chat_id=chat_id, text=text) for chat_id in NOTIFY_CHAT_IDS]
+    if len(sends) == 1:
+        # A single recipient needs no gather Task around its send
+        try:
+            results = [await sends[0]]
+        except Exception as e:
+            results = [e]
+    else:
+        # One concurrent round for all recipients
+        results = await asyncio.gather(*sends, return_exceptions=True)
+    for chat_id, result in zip(NOTIFY_CHAT_IDS, results):
+        if isinstance(result, Exception):
+            logger.error(
+                f"Failed to send notification to {chat_id}: {result}",
+                exc_info=result
+            )
+
+
+def links_keyboard(stream_link: str, online_link: str) -> InlineKeyboardMarkup:
+    """
+    Builds the inline keyboard with the stream and download buttons.
+
+    Args:
+        stream_link (str): The link to stream the media.
+        online_link (str): The direct download link for the media.
+
+    Returns:
+        InlineKeyboardMarkup: The keyboard to attach to a links message.
+    """
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("🖥️ Watch Now", url=stream_link),
+            InlineKeyboardButton("📥 Download", url=online_link)
+        ]
+    ])
 
 
 async def handle_user_error(message: Message, error_msg: str) -> None:
@@ -108,49 +197,92 @@ def get_file_unique_id(media_message: Message) -> Optional[str]:
     Returns:
         Optional[str]: The unique file identifier if found, else None.
     """
-    media_types = [
-        'document', 'video', 'audio', 'photo', 'animation',
-        'voice', 'video_note', 'sticker'
-    ]
-    for media_type in media_types:
-        media = getattr(media_message, media_type, None)
-        if media:
-            return media.file_unique_id
-    return None
+    media = get_media_from_message(media_message)
+    return media.file_unique_id if media else None
 
 
-async def forward_media(media_message: Message) -> Message:
+async def copy_or_forward(media_message: Message) -> Message:
+    """
+    Copies a media message to the BIN_CHANNEL, falling back to forwarding it.
+
+    The operation that last worked for the source chat is tried first, e.g.
+    forwarding for chats with protected content.
+
+    Args:
+        media_message (Message): The media message to copy or forward.
+
+    Returns:
+        Message: The new message in BIN_CHANNEL.
+
+    Raises:
+        FloodWait: If Telegram rate limits either operation.
+        Exception: If both operations fail.
+    """
+    chat_id: int = media_message.chat.id
+    prefer_copy: bool = COPY_PREFERRED.get(chat_id, True)
+    operations: Tuple[str, ...] = ("copy", "forward") if prefer_copy else ("forward", "copy")
+    last_error: Optional[Exception] = None
+    for operation in operations:
+        try:
+            log_msg: Message = await getattr(media_message, operation)(chat_id=Var.BIN_CHANNEL)
+            COPY_PREFERRED[chat_id] = operation == "copy"
+            return log_msg
+        except FloodWait:
+            raise
+        except Exception as e:
+            logger.error(f"Error using {operation} on media message: {e}", exc_info=True)
+            last_error = e
+    raise last_error
+
+
+async def forward_media(media_message: Message, max_retries: int = 5) -> Message:
     """
     Forwards a media message to the BIN_CHANNEL.
 
     Args:
         media_message (Message): The media message to forward.
+        max_retries (int): Number of attempts before giving up on FloodWait or
+            transient network errors.
 
     Returns:
         Message: The forwarded message in BIN_CHANNEL.
 
     Raises:
-        Exception: If forwarding fails after handling FloodWait.
+        Exception: If forwarding fails, or FloodWait or network errors persist after all retries.
     """
-    try:
-        return await media_message.copy(chat_id=Var.BIN_CHANNEL)
-    except Exception as copy_error:
-        error_text = f"Error copying media message: {copy_error}"
-        logger.error(error_text, exc_info=True)
-        
-    try:
-        return await media_message.forward(chat_id=Var.BIN_CHANNEL)
-    except FloodWait as flood_error:
-        await handle_flood_wait(flood_error)
-        return await forward_media(media_message)  # Retry forwarding
-    except Exception as forward_error:
+    # Media posted in BIN_CHANNEL itself is already where the links point
+    if media_message.chat.id == Var.BIN_CHANNEL:
+        return media_message
+
+    for retry in range(max_retries):
+        try:
+            # Sleep outside the semaphore so a flood-limited call does not hold a slot
+            async with FORWARD_SEMAPHORE:
+                return await copy_or_forward(media_message)
+        except FloodWait as flood_error:
+            if retry == max_retries - 1:
+                raise
+            await handle_flood_wait(flood_error, retry)
+        except (asyncio.TimeoutError, OSError) as network_error:
+            if retry == max_retries - 1:
+                spawn(notify_owner(
+                    media_message._client, f"Error forwarding media message: {network_error}"
+                ))
+                raise
+            # Exponential backoff with jitter for transient network failures
+            delay: float = 0.5 * 2 ** retry
+            logger.warning(
+                "Network error forwarding media message, retrying in %.1fs: %s",
+                delay, network_error
+            )
+            await asyncio.sleep(delay + random.uniform(0, 0.1 * delay))
+        except Exception as forward_error:
             final_error_text = f"Error forwarding media message: {forward_error}"
-            logger.error(final_error_text, exc_info=True)
-            await notify_owner(media_message._client, final_error_text)
+            spawn(notify_owner(media_message._client, final_error_text))
             raise
 
 
-async def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
+def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
     """
     Generates streaming and download links for the forwarded media message.
 
@@ -165,27 +297,170 @@ async def generate_media_links(log_msg: Message) -> Tuple[str, str, str, str]:
         Exception: If link generation fails.
     """
     try:
-        base_url = Var.URL.rstrip("/")
         file_id = log_msg.id
-        media_name = get_name(log_msg)
+        # Locate the media once and read name, size and hash from it
+        media = get_media_from_message(log_msg)
+        media_name = getattr(media, "file_name", "")
         if isinstance(media_name, bytes):
             media_name = media_name.decode('utf-8', errors='replace')
         else:
             media_name = str(media_name)
-        media_size = humanbytes(get_media_file_size(log_msg))
-        file_name_encoded = quote(media_name)
-        hash_value = get_hash(log_msg)
-        stream_link = f"{base_url}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
-        online_link = f"{base_url}/{file_id}/{file_name_encoded}?hash={hash_value}"
-        logger.info(f"Generated media links for file_id {file_id}")
+        media_size = humanbytes(getattr(media, "file_size", 0))
+        file_name_encoded = quote_file_name(media_name)
+        hash_value = getattr(media, "file_unique_id", "")[:6]
+        stream_link = f"{Var.BASE_URL}/watch/{file_id}/{file_name_encoded}?hash={hash_value}"
+        online_link = f"{Var.BASE_URL}/{file_id}/{file_name_encoded}?hash={hash_value}"
+        logger.info("Generated media links for file_id %s", file_id)
         return stream_link, online_link, media_name, media_size
     except Exception as e:
         error_text = f"Error generating media links: {e}"
         logger.error(error_text, exc_info=True)
-        await notify_owner(log_msg._client, error_text)
+        spawn(notify_owner(log_msg._client, error_text))
         raise
 
 
+def get_cached_links(cache_key: str) -> Optional[CacheEntry]:
+    """
+    Looks up cached links and marks them as most recently used, evicting
+    them instead if they have expired.
+
+    Args:
+        cache_key (str): The file_unique_id of the media.
+
+    Returns:
+        Optional[CacheEntry]: The cached links, or None if missing or expired.
+    """
+    entry: Optional[CacheEntry] = CACHE.get(cache_key)
+    if entry is None:
+        return None
+    if entry.expires_at <= time.monotonic():
+        del CACHE[cache_key]
+        return None
+    CACHE.move_to_end(cache_key)
+    return entry
+
+
+def cache_links(cache_key: str, entry: CacheEntry) -> None:
+    """
+    Stores generated links in the cache, evicting least recently used entries
+    and any expired ones at its front.
+
+    Args:
+        cache_key (str): The file_unique_id of the media.
+        entry (CacheEntry): The links to cache.
+    """
+    CACHE[cache_key] = entry
+    CACHE.move_to_end(cache_key)
+    while len(CACHE) > CACHE_MAX_SIZE:
+        CACHE.popitem(last=False)
+    # Best-effort sweep of the least recently used end; expired entries elsewhere
+    # are evicted when looked up
+    now: float = time.monotonic()
+    while True:
+        oldest_key, oldest = next(iter(CACHE.items()))
+        if oldest.expires_at > now:
+            break
+        del CACHE[oldest_key]
+
+
+async def load_stored_links(cache_key: str) -> Optional[CacheEntry]:
+    """
+    Loads links stored in the database by an earlier run of the bot.
+
+    Args:
+        cache_key (str): The file_unique_id of the media.
+
+    Returns:
+        Optional[CacheEntry]: The stored links, or None if missing or unusable.
+    """
+    try:
+        stored: Optional[dict] = await db.get_links(cache_key)
+    except Exception as e:
+        logger.error(f"Error loading stored links for {cache_key}: {e}", exc_info=True)
+        return None
+    # Links generated under a different URL, or pointing into a different
+    # BIN_CHANNEL, are stale
+    if (
+        not stored
+        or stored.get('bin_channel') != Var.BIN_CHANNEL
+        or not stored.get('stream_link', '').startswith(f"{Var.BASE_URL}/")
+    ):
+        return None
+    return CacheEntry(
+        media_name=stored['media_name'],
+        media_size=stored['media_size'],
+        stream_link=stored['stream_link'],
+        online_link=stored['online_link'],
+        expires_at=time.monotonic() + CACHE_EXPIRY
+    )
+
+
+async def create_media_links(
+    cache_key: str,
+    media_message: Message
+) -> Tuple[Optional[Message], str, str, str, str]:
+    """
+    Loads the links stored for the media, or forwards it to BIN_CHANNEL and
+    generates them, and caches the result.
+
+    Args:
+        cache_key (str): The file_unique_id of the media.
+        media_message (Message): The media message to process.
+
+    Returns:
+        Tuple[Optional[Message], str, str, str, str]: The BIN_CHANNEL message (None
+        if the links were stored), stream link, online link, media name and media size.
+    """
+    stored: Optional[CacheEntry] = await load_stored_links(cache_key)
+    if stored:
+        cache_links(cache_key, stored)
+        return None, stored.stream_link, stored.online_link, stored.media_name, stored.media_size
+
+    log_msg: Message = await forward_media(media_message)
+    stream_link, online_link, media_name, media_size = generate_media_links(log_msg)
+    cache_links(cache_key, CacheEntry(
+        media_name=media_name,
+        media_size=media_size,
+        stream_link=stream_link,
+        online_link=online_link,
+        expires_at=time.monotonic() + CACHE_EXPIRY
+    ))
+    # Persist in the background so links survive restarts without re-forwarding
+    spawn(db.save_links(cache_key, {
+        'bin_channel': Var.BIN_CHANNEL,
+        'media_name': media_name,
+        'media_size': media_size,
+        'stream_link': stream_link,
+        'online_link': online_link
+    }))
+    return log_msg, stream_link, online_link, media_name, media_size
+
+
+async def get_media_links(
+    cache_key: str,
+    media_message: Message
+) -> Tuple[Optional[Message], str, str, str, str]:
+    """
+    Generates links for uncached media, sharing one generation between concurrent
+    requests for the same file.
+
+    Args:
+        cache_key (str): The file_unique_id of the media.
+        media_message (Message): The media message to process.
+
+    Returns:
+        Tuple[Optional[Message], str, str, str, str]: The BIN_CHANNEL message (None
+        if the links were stored), stream link, online link, media name and media size.
+    """
+    task = INFLIGHT.get(cache_key)
+    if task is None:
+        task = asyncio.ensure_future(create_media_links(cache_key, media_message))
+        INFLIGHT[cache_key] = task
+        task.add_done_callback(lambda _: INFLIGHT.pop(cache_key, None))
+    # Shield the shared generation so one cancelled request does not cancel it for the others
+    return await asyncio.shield(task)
+
+
 async def send_links_to_user(
     client: Client,
     command_message: Message,
@@ -205,13 +480,11 @@ async def send_links_to_user(
         stream_link (str): The link to stream the media.
         online_link (str): The direct download link for the media.
     """
-    msg_text = (
-        "🔗 **Your Links are Ready!**\n\n"
-        f"📄 **File Name:** `{media_name}`\n"
-        f"📂 **File Size:** `{media_size}`\n\n"
-        f"📥 **Download Link:**\n`{online_link}`\n\n"
-        f"🖥️ **Watch Now:**\n`{stream_link}`\n\n"
-        "⏰ **Note:** Links are available as long as the bot is active."
+    msg_text = LINKS_READY_MSG.format(
+        media_name=media_name,
+        media_size=media_size,
+        online_link=online_link,
+        stream_link=stream_link
     )
     try:
         await command_message.reply_text(
@@ -219,18 +492,13 @@ async def send_links_to_user(
             quote=True,
             disable_web_page_preview=True,
             parse_mode=enums.ParseMode.MARKDOWN,
-            reply_markup=InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("🖥️ Watch Now", url=stream_link),
-                    InlineKeyboardButton("📥 Download", url=online_link)
-                ]
-            ]),
+            reply_markup=links_keyboard(stream_link, online_link),
         )
-        logger.info(f"Sent links to user {command_message.from_user.id}")
+        logger.info("Sent links to user %s", command_message.from_user.id)
     except Exception as e:
         error_text = f"Error sending links to user: {e}"
         logger.error(error_text, exc_info=True)
-        await notify_owner(client, error_text)
+        spawn(notify_owner(client, error_text))
         raise
 
 
@@ -251,14 +519,17 @@ async def log_request(
     """
     try:
         await log_msg.reply_text(
-            f"👤 **Requested by:** [{user.first_name}](tg://user?id={user.id})\n"
-            f"🆔 **User ID:** `{user.id}`\n\n"
-            f"📥 **Download Link:** `{online_link}`\n"
-            f"🖥️ **Watch Now Link:** `{stream_link}`",
+            REQUEST_LOG_MSG.format(
+                # Channels have a title instead of a first name
+                first_name=getattr(user, "first_name", None) or getattr(user, "title", ""),
+                user_id=user.id,
+                online_link=online_link,
+                stream_link=stream_link
+            ),
             disable_web_page_preview=True,
             quote=True
         )
-        logger.info(f"Logged request in BIN_CHANNEL for user {user.id}")
+        logger.info("Logged request in BIN_CHANNEL for user %s", user.id)
     except Exception as e:
         error_text = f"Error logging request: {e}"
         logger.error(error_text, exc_info=True)
@@ -266,7 +537,8 @@ async def log_request(
 
 async def check_admin_privileges(client: Client, chat_id: int) -> bool:
     """
-    Checks if the bot is an admin in the specified group or supergroup.
+    Checks if the bot is an admin in the specified group, supergroup or channel,
+    caching a positive answer for a few minutes.
 
     Args:
         client (Client): The Pyrogram client instance.
@@ -275,14 +547,19 @@ async def check_admin_privileges(client: Client, chat_id: int) -> bool:
     Returns:
         bool: True if the bot is an admin, False otherwise.
     """
+    if chat_id in ADMIN_CACHE:
+        return True
     try:
         # Retrieve the bot's member status in the chat
         member = await client.get_chat_member(chat_id, client.me.id)
         # Check if the bot has admin status or is the creator of the group
-        return member.status in [
+        is_admin: bool = member.status in [
             enums.ChatMemberStatus.ADMINISTRATOR,
             enums.ChatMemberStatus.OWNER
         ]
+        if is_admin:
+            ADMIN_CACHE[chat_id] = True
+        return is_admin
     except Exception as e:
         # Log any errors and return False if the check fails
         logger.error(
@@ -291,6 +568,38 @@ async def check_admin_privileges(client: Client, chat_id: int) -> bool:
         )
         return False
 
+
+async def check_edit_privileges(client: Client, chat_id: int) -> bool:
+    """
+    Checks if the bot may edit other members' messages in the specified channel,
+    caching a positive answer for a few minutes.
+
+    Args:
+        client (Client): The Pyrogram client instance.
+        chat_id (int): The ID of the chat to check.
+
+    Returns:
+        bool: True if the bot can edit messages, False otherwise.
+    """
+    if chat_id in EDIT_CACHE:
+        return True
+    try:
+        member = await client.get_chat_member(chat_id, client.me.id)
+        # Being an admin is not enough; the right to edit posts is granted separately
+        can_edit: bool = member.status == enums.ChatMemberStatus.OWNER or (
+            member.status == enums.ChatMemberStatus.ADMINISTRATOR
+            and bool(member.privileges and member.privileges.can_edit_messages)
+        )
+        if can_edit:
+            EDIT_CACHE[chat_id] = True
+        return can_edit
+    except Exception as e:
+        logger.error(
+            f"Error checking edit privileges in chat {chat_id}: {e}",
+            exc_info=True
+        )
+        return False
+
 # ==============================
 # Command Handlers
 # ==============================
@@ -308,7 +617,7 @@ async def link_handler(client: Client, message: Message) -> None:
     user_id: int = message.from_user.id
 
     # Check if the user has started the bot in private (registration check)
-    if not await db.is_user_exist(user_id):
+    if user_id not in KNOWN_USERS and not await db.is_user_exist(user_id):
         try:
             invite_link: str = f"https://t.me/{client.me.username}?start=start"
             await message.reply_text(
@@ -321,7 +630,7 @@ async def link_handler(client: Client, message: Message) -> None:
                 ]),
                 quote=True
             )
-            logger.info(f"User {user_id} prompted to start bot in private.")
+            logger.info("User %s prompted to start bot in private.", user_id)
         except Exception as e:
             logger.error(
                 f"Error sending start prompt to user: {e}",
@@ -332,6 +641,7 @@ async def link_handler(client: Client, message: Message) -> None:
                 quote=True
             )
         return
+    KNOWN_USERS.add(user_id)
 
     # Check for admin privileges if in a group or supergroup
     if message.chat.type in [enums.ChatType.GROUP, enums.ChatType.SUPERGROUP]:
@@ -360,7 +670,8 @@ async def link_handler(client: Client, message: Message) -> None:
         )
         return
 
-    command_parts: List[str] = message.text.strip().split()
+    # The command filter has already split the text into message.command
+    command_parts: List[str] = message.command
     num_files: int = 1
     if len(command_parts) > 1:
         try:
@@ -384,6 +695,45 @@ async def link_handler(client: Client, message: Message) -> None:
         await process_multiple_messages(client, message, reply_msg, num_files)
 
 
+async def fetch_messages(
+    client: Client,
+    chat_id: int,
+    message_ids: List[int],
+    max_retries: int = 3,
+    timeout: float = 30
+) -> List[Optional[Message]]:
+    """
+    Fetches messages, retrying after FloodWait or a timed-out request.
+
+    Args:
+        client (Client): The Pyrogram client instance.
+        chat_id (int): The chat to fetch the messages from.
+        message_ids (List[int]): The IDs of the messages to fetch.
+        max_retries (int): Number of attempts before giving up.
+        timeout (float): Seconds to wait for each attempt.
+
+    Returns:
+        List[Optional[Message]]: The fetched messages.
+
+    Raises:
+        RPCError: If Telegram rejects the request or keeps flood-limiting it.
+        asyncio.TimeoutError: If every attempt timed out.
+    """
+    for retry in range(max_retries):
+        try:
+            return await asyncio.wait_for(
+                client.get_messages(chat_id=chat_id, message_ids=message_ids),
+                timeout=timeout
+            )
+        except (FloodWait, asyncio.TimeoutError) as e:
+            if retry == max_retries - 1:
+                raise
+            if isinstance(e, FloodWait):
+                await handle_flood_wait(e, retry)
+            else:
+                logger.warning("Timed out fetching messages from %s, retrying.", chat_id)
+
+
 async def process_multiple_messages(
     client: Client,
     command_message: Message,
@@ -405,11 +755,8 @@ async def process_multiple_messages(
     message_ids: List[int] = list(range(start_message_id, end_message_id + 1))
 
     try:
-        messages: List[Optional[Message]] = await client.get_messages(
-            chat_id=chat_id,
-            message_ids=message_ids
-        )
-    except RPCError as e:
+        messages: List[Optional[Message]] = await fetch_messages(client, chat_id, message_ids)
+    except (RPCError, asyncio.TimeoutError) as e:
         await command_message.reply_text(
             f"❌ Failed to fetch messages: {e}",
             quote=True
@@ -417,38 +764,76 @@ async def process_multiple_messages(
         logger.error(f"Failed to fetch messages: {e}", exc_info=True)
         return
 
-    processed_count: int = 0
-    download_links: List[str] = []
+    # Process a few files at a time; the links go out in one combined reply below
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(4)
+
+    async def process_bounded(msg: Message) -> Optional[str]:
+        async with semaphore:
+            return await process_media_message(client, command_message, msg, send_reply=False)
+
+    media_messages: List[Message] = []
     for msg in messages:
         if msg and msg.media:
-            download_link: Optional[str] = await process_media_message(
-                client,
-                command_message,
-                msg
-            )
-            if download_link:
-                download_links.append(download_link)
-                processed_count += 1
+            media_messages.append(msg)
         else:
             logger.info(
-                f"Message {msg.id if msg else 'Unknown'} does not contain media or is inaccessible, skipping."
+                "Message %s does not contain media or is inaccessible, skipping.",
+                msg.id if msg else 'Unknown'
             )
 
-    if download_links:
-        links_text: str = "\n".join(download_links)
-        message_text: str = (
-            f"📥 **Here are your {processed_count} combined download links:**\n\n`{links_text}`"
-        )
+    results = await asyncio.gather(
+        *(process_bounded(msg) for msg in media_messages),
+        return_exceptions=True
+    )
+    # gather keeps the input order, so the combined links follow the chat order
+    download_links: List[str] = [
+        link for link in results if link and not isinstance(link, Exception)
+    ]
+
+    # Send the combined links and the summary in as few messages as fit Telegram's limit
+    for message_text in build_links_messages(download_links):
         await command_message.reply_text(
             message_text,
             quote=True,
             disable_web_page_preview=True
         )
 
-    await command_message.reply_text(
-        f"✅ **Processed {processed_count} files starting from the replied message.**",
-        quote=True
-    )
+
+def build_links_messages(download_links: List[str]) -> List[str]:
+    """
+    Packs the combined download links and the summary into as few messages as
+    possible, each within Telegram's message length limit.
+
+    Args:
+        download_links (List[str]): The download links, in chat order.
+
+    Returns:
+        List[str]: The message texts to send, in order.
+    """
+    processed_count: int = len(download_links)
+    summary: str = f"✅ **Processed {processed_count} files starting from the replied message.**"
+    if not download_links:
+        return [summary]
+
+    messages: List[str] = []
+    header: str = f"📥 **Here are your {processed_count} combined download links:**\n\n"
+    chunk: List[str] = []
+    chunk_length: int = len(header) + 2  # header plus the backticks around the links
+    for link in download_links:
+        # +1 for the newline joining this link to the previous one
+        if chunk and chunk_length + len(link) + 1 > MAX_MESSAGE_LENGTH:
+            messages.append(header + "`" + "\n".join(chunk) + "`")
+            header, chunk, chunk_length = "", [], 2
+        chunk.append(link)
+        chunk_length += len(link) + (1 if len(chunk) > 1 else 0)
+    messages.append(header + "`" + "\n".join(chunk) + "`")
+
+    # Keep the summary in the last message when it fits, as a separate one otherwise
+    if len(messages[-1]) + 2 + len(summary) <= MAX_MESSAGE_LENGTH:
+        messages[-1] += "\n\n" + summary
+    else:
+        messages.append(summary)
+    return messages
 
 
 @StreamBot.on_message(
@@ -467,13 +852,13 @@ async def private_receive_handler(client: Client, message: Message) -> None:
         client (Client): The Pyrogram client instance.
         message (Message): The incoming media message.
     """
-    # Log new user if applicable
+    # Log new user in the background if applicable
     if message.from_user:
-        await log_new_user(
+        spawn(log_new_user(
             bot=client,
             user_id=message.from_user.id,
             first_name=message.from_user.first_name
-        )
+        ))
 
     # Process the media message
     await process_media_message(client, message, message)
@@ -488,19 +873,22 @@ async def log_new_user(bot: Client, user_id: int, first_name: str):
         user_id (int): The Telegram user ID.
         first_name (str): The first name of the user.
     """
+    if user_id in KNOWN_USERS:
+        return
     try:
-        if not await db.is_user_exist(user_id):
-            await db.add_user(user_id)
+        is_new: bool = await db.add_user(user_id)
+        KNOWN_USERS.add(user_id)
+        if is_new:
             try:
-                if hasattr(Var, 'BIN_CHANNEL') and isinstance(Var.BIN_CHANNEL, int) and Var.BIN_CHANNEL != 0:
+                if BIN_CHANNEL is not None:
                     await bot.send_message(
-                        Var.BIN_CHANNEL,
+                        BIN_CHANNEL,
                         f"👋 **New User Alert!**\n\n"
                         f"✨ **Name:** [{first_name}](tg://user?id={user_id})\n"
                         f"🆔 **User ID:** `{user_id}`\n\n"
                         "has started the bot!"
                     )
-                logger.info(f"New user added: {user_id} - {first_name}")
+                logger.info("New user added: %s - %s", user_id, first_name)
             except Exception as e:
                 logger.error(f"Failed to send new user alert to BIN_CHANNEL: {e}", exc_info=True)
     except Exception as e:
@@ -511,7 +899,8 @@ async def log_new_user(bot: Client, user_id: int, first_name: str):
 async def process_media_message(
     client: Client,
     command_message: Message,
-    media_message: Message
+    media_message: Message,
+    send_reply: bool = True
 ) -> Optional[str]:
     """
     Processes a single media message by forwarding, generating links, caching,
@@ -521,67 +910,73 @@ async def process_media_message(
         client (Client): The Pyrogram client instance.
         command_message (Message): The original command or media message.
         media_message (Message): The media message to process.
+        send_reply (bool): Whether to reply with the links; batches send one combined reply instead.
 
     Returns:
         Optional[str]: The online download link if successful, else None.
     """
+    # The identifier does not change between retries, so resolve it once up front
+    cache_key: Optional[str] = get_file_unique_id(media_message)
+    if cache_key is None:
+        await command_message.reply_text(
+            "⚠️ Could not extract file identifier from the media."
+        )
+        return None
+
     retries: int = 0
     max_retries: int = 5
     while retries < max_retries:
         try:
-            cache_key: Optional[str] = get_file_unique_id(media_message)
-            if cache_key is None:
-                await command_message.reply_text(
-                    "⚠️ Could not extract file identifier from the media."
+            cached_data: Optional[CacheEntry] = get_cached_links(cache_key)
+            if cached_data:
+                if send_reply:
+                    await send_links_to_user(
+                        client,
+                        command_message,
+                        cached_data.media_name,
+                        cached_data.media_size,
+                        cached_data.stream_link,
+                        cached_data.online_link
+                    )
+                logger.info("Served links from cache for user %s", command_message.from_user.id)
+                return cached_data.online_link
+
+            log_msg, stream_link, online_link, media_name, media_size = await get_media_links(
+                cache_key, media_message
+            )
+
+            # Reply to the user and log a newly forwarded file in BIN_CHANNEL concurrently
+            tasks = []
+            if send_reply:
+                tasks.append(
+                    send_links_to_user(
+                        client,
+                        command_message,
+                        media_name,
+                        media_size,
+                        stream_link,
+                        online_link
+                    )
                 )
-                return None
-
-            cached_data: Optional[Dict[str, Union[str, float]]] = CACHE.get(cache_key)
-            if cached_data and (time.time() - cached_data['timestamp'] < CACHE_EXPIRY):
-                await send_links_to_user(
-                    client,
-                    command_message,
-                    cached_data['media_name'],
-                    cached_data['media_size'],
-                    cached_data['stream_link'],
-                    cached_data['online_link']
+            if log_msg is not None:
+                tasks.append(
+                    log_request(log_msg, command_message.from_user, stream_link, online_link)
                 )
-                logger.info(
-                    f"Served links from cache for user {command_message.from_user.id}"
-                )
-                return cached_data['online_link']
-
-            log_msg: Message = await forward_media(media_message)
-            stream_link, online_link, media_name, media_size = await generate_media_links(log_msg)
-
-            CACHE[cache_key] = {
-                'media_name': media_name,
-                'media_size': media_size,
-                'stream_link': stream_link,
-                'online_link': online_link,
-                'timestamp': time.time()
-            }
-
-            await send_links_to_user(
-                client,
-                command_message,
-                media_name,
-                media_size,
-                stream_link,
-                online_link
-            )
-            await log_request(log_msg, command_message.from_user, stream_link, online_link)
+            if len(tasks) == 1:
+                await tasks[0]
+            elif tasks:
+                await asyncio.gather(*tasks)
             return online_link
 
         except FloodWait as e:
-            await handle_flood_wait(e)
+            await handle_flood_wait(e, retries)
             retries += 1
             continue
         except Exception as e:
             error_text: str = f"Error processing media message: {e}"
             logger.error(error_text, exc_info=True)
             await handle_user_error(command_message, "An unexpected error occurred.")
-            await notify_owner(client, f"⚠️ Critical error occurred:\n{e}")
+            spawn(notify_owner(client, f"⚠️ Critical error occurred:\n{e}"))
             return None
 
     return None
@@ -611,92 +1006,61 @@ async def channel_receive_handler(client: Client, broadcast: Message) -> None:
         try:
             if int(broadcast.chat.id) in Var.BANNED_CHANNELS:
                 await client.leave_chat(broadcast.chat.id)
-                logger.info(f"Left banned channel: {broadcast.chat.id}")
+                logger.info("Left banned channel: %s", broadcast.chat.id)
                 return
 
             log_msg: Message = await forward_media(broadcast)
-            stream_link, online_link, media_name, media_size = await generate_media_links(log_msg)
+            stream_link, online_link, media_name, media_size = generate_media_links(log_msg)
             await log_request(log_msg, broadcast.chat, stream_link, online_link)
 
-            can_edit: bool = False
-            try:
-                member = await client.get_chat_member(broadcast.chat.id, client.me.id)
-                if member.status in ["administrator", "creator"]:
-                    can_edit = True
-                logger.info(
-                    f"Bot can_edit_messages in chat {broadcast.chat.id}: {can_edit}"
-                )
-            except Exception as e:
-                logger.error(
-                    f"Error checking bot's admin status: {e}",
-                    exc_info=True
-                )
+            can_edit: bool = await check_edit_privileges(client, broadcast.chat.id)
+            logger.info(
+                "Bot can_edit_messages in chat %s: %s", broadcast.chat.id, can_edit
+            )
 
+            keyboard: InlineKeyboardMarkup = links_keyboard(stream_link, online_link)
+            edited: bool = False
             if can_edit:
-                await client.edit_message_reply_markup(
-                    chat_id=broadcast.chat.id,
-                    message_id=broadcast.id,
-                    reply_markup=InlineKeyboardMarkup([
-                        [
-                            InlineKeyboardButton("🖥️ Watch Now", url=stream_link),
-                            InlineKeyboardButton("📥 Download", url=online_link)
-                        ]
-                    ])
-                )
-                logger.info(f"Edited broadcast message in channel {broadcast.chat.id}")
-            else:
+                try:
+                    await client.edit_message_reply_markup(
+                        chat_id=broadcast.chat.id,
+                        message_id=broadcast.id,
+                        reply_markup=keyboard
+                    )
+                    edited = True
+                    logger.info("Edited broadcast message in channel %s", broadcast.chat.id)
+                except FloodWait:
+                    raise
+                except Exception as e:
+                    # Rights may have changed since they were cached; post the links instead
+                    EDIT_CACHE.pop(broadcast.chat.id, None)
+                    logger.warning(
+                        "Could not edit broadcast message in channel %s, "
+                        "sending a new message instead: %s",
+                        broadcast.chat.id, e
+                    )
+            if not edited:
                 await client.send_message(
                     chat_id=broadcast.chat.id,
-                    text=(
-                        "🔗 **Your Links are Ready!**\n\n"
-                        f"📄 **File Name:** `{media_name}`\n"
-                        f"📂 **File Size:** `{media_size}`\n\n"
-                        f"📥 **Download Link:**\n`{online_link}`\n\n"
-                        f"🖥️ **Watch Now:**\n`{stream_link}`\n\n"
-                        "⏰ **Note:** Links are available as long as the bot is active."
+                    text=LINKS_READY_MSG.format(
+                        media_name=media_name,
+                        media_size=media_size,
+                        online_link=online_link,
+                        stream_link=stream_link
                     ),
-                    reply_markup=InlineKeyboardMarkup([
-                        [
-                            InlineKeyboardButton("🖥️ Watch Now", url=stream_link),
-                            InlineKeyboardButton("📥 Download", url=online_link)
-                        ]
-                    ]),
+                    reply_markup=keyboard,
                 )
                 logger.info(
-                    f"Sent new message with links in channel {broadcast.chat.id}"
+                    "Sent new message with links in channel %s", broadcast.chat.id
                 )
             break
 
         except FloodWait as e:
-            await handle_flood_wait(e)
+            await handle_flood_wait(e, retries)
             retries += 1
             continue
         except Exception as e:
             error_text: str = f"Error handling channel message: {e}"
             logger.error(error_text, exc_info=True)
-            await notify_owner(client, f"⚠️ Critical error occurred in channel handler:\n{e}")
+            spawn(notify_owner(client, f"⚠️ Critical error occurred in channel handler:\n{e}"))
             break
-
-# ==============================
-# Background Tasks
-# ==============================
-
-async def clean_cache_task() -> None:
-    """
-    Periodically cleans up expired entries from the cache.
-    """
-    while True:
-        await asyncio.sleep(3600)  # Sleep for 1 hour
-        current_time: float = time.time()
-        keys_to_delete: List[str] = [
-            key for key, value in CACHE.items()
-            if current_time - value['timestamp'] > CACHE_EXPIRY
-        ]
-        for key in keys_to_delete:
-            del CACHE[key]
-        if keys_to_delete:
-            logger.info(f"Cache cleaned up. Removed {len(keys_to_delete)} entries.")
-
-
-# Start the cache cleaning task
-StreamBot.loop.create_task(clean_cache_task())
@@ -2,9 +2,10 @@
 
 import asyncio
 import inspect
+import itertools
 import mimetypes
+import os
 import re
-import secrets
 import time
 from functools import wraps
 from typing import Any, Tuple
@@ -41,10 +42,14 @@ PATH_PATTERN_WITH_ID = re.compile(r"(\d+)(?:/[\S\s]+)?")
 # Define the routes for the web application
 routes = web.RouteTableDef()
 
-# Cache for ByteStreamer instances with a lock for thread safety
+# Cache for ByteStreamer instances
 # The cache size is configurable via Var.CACHE_SIZE, defaulting to 100
 class_cache: LRUCache = LRUCache(maxsize=int(getattr(Var, 'CACHE_SIZE', 100)))
-class_cache_lock = asyncio.Lock()
+
+# Tags for files without a name: process ID base plus a monotonic counter,
+# avoiding an os.urandom call per request
+FALLBACK_NAME_BASE = f"{os.getpid() & 0xFFFF:04x}"
+fallback_name_counter = itertools.count()
 
 
 def exception_handler(func):
@@ -60,12 +65,12 @@ def exception_handler(func):
             return await func(request)
         except InvalidHash:
             logger.warning(
-                f"Invalid hash for path: {request.match_info.get('path', '')}"
+                "Invalid hash for path: %s", request.match_info.get('path', '')
             )
             raise web.HTTPForbidden(text="Invalid secure hash.")
         except FileNotFound as e:
             logger.warning(
-                f"File not found for path: {request.match_info.get('path', '')}"
+                "File not found for path: %s", request.match_info.get('path', '')
             )
             raise web.HTTPNotFound(text=str(e))
         except (
@@ -105,14 +110,14 @@ def parse_path(request: web.Request, path_param: str) -> Tuple[int, str]:
         web.HTTPNotFound: If the path parameter is invalid or does not match the expected format.
         web.HTTPForbidden: If the secure hash length is invalid.
     """
-    logger.debug(f"Parsing path: {path_param}")
+    logger.debug("Parsing path: %s", path_param)
 
     # Try matching the path with a secure hash prefix
     match = PATH_PATTERN_WITH_HASH.match(path_param)
     if match:
         secure_hash = match.group(1)
         message_id = int(match.group(2))
-        logger.debug(f"Extracted secure_hash: {secure_hash}, message_id: {message_id}")
+        logger.debug("Extracted secure_hash: %s, message_id: %s", secure_hash, message_id)
     else:
         # Fallback: extract message_id and get secure_hash from query parameters
         id_match = PATH_PATTERN_WITH_ID.match(path_param)
@@ -123,7 +128,7 @@ def parse_path(request: web.Request, path_param: str) -> Tuple[int, str]:
                 # Secure hash is missing; raise 404 without logging an error
                 raise web.HTTPNotFound(text="Invalid link. Secure hash is missing.")
             logger.debug(
-                f"Extracted message_id: {message_id}, secure_hash from query: {secure_hash}"
+                "Extracted message_id: %s, secure_hash from query: %s", message_id, secure_hash
             )
         else:
             # Path parameter is invalid; raise 404 without logging an error
@@ -131,12 +136,22 @@ def parse_path(request: web.Request, path_param: str) -> Tuple[int, str]:
 
     # Validate the secure hash length
     if len(secure_hash) != SECURE_HASH_LENGTH:
-        logger.warning(f"Invalid secure hash length for path: {path_param}")
+        logger.warning("Invalid secure hash length for path: %s", path_param)
         raise web.HTTPForbidden(text="Invalid secure hash length.")
 
     return message_id, secure_hash
 
 
+def fallback_name_tag() -> str:
+    """
+    Generates a short tag used to name files that have no file name.
+
+    Returns:
+        str: An 8-character hexadecimal tag.
+    """
+    return f"{FALLBACK_NAME_BASE}{next(fallback_name_counter) & 0xFFFF:04x}"
+
+
 def select_client() -> Tuple[int, Any]:
     """
     Selects the client with the minimal workload.
@@ -147,7 +162,7 @@ def select_client() -> Tuple[int, Any]:
     # Find the client with the least workload
     min_load_index = min(work_loads.items(), key=lambda x: x[1])[0]
     client = multi_clients[min_load_index]
-    logger.debug(f"Selected client {min_load_index} with minimal load.")
+    logger.debug("Selected client %s with minimal load.", min_load_index)
     return min_load_index, client
 
 
@@ -194,16 +209,16 @@ async def stream_handler_watch(request: web.Request):
         web.Response: The HTTP response with the rendered HTML page.
     """
     path = request.match_info["path"]
-    logger.debug(f"Handling watch request from {request.remote} for path: {path}")
+    logger.debug("Handling watch request from %s for path: %s", request.remote, path)
     message_id, secure_hash = parse_path(request, path)
 
     try:
         page_content = await render_page(message_id, secure_hash)
     except InvalidHash:
-        logger.warning(f"Invalid secure hash for message ID {message_id}")
+        logger.warning("Invalid secure hash for message ID %s", message_id)
         raise web.HTTPForbidden(text="Invalid secure hash.")
     except FileNotFound as e:
-        logger.warning(f"File not found for message ID {message_id}: {e}")
+        logger.warning("File not found for message ID %s: %s", message_id, e)
         raise web.HTTPNotFound(text="Requested file not found.")
     except Exception as e:
         logger.error(
@@ -227,7 +242,7 @@ async def stream_handler(request: web.Request):
         web.Response: The HTTP response with the media stream.
     """
     path = request.match_info["path"]
-    logger.debug(f"Handling media stream request from {request.remote} for path: {path}")
+    logger.debug("Handling media stream request from %s for path: %s", request.remote, path)
     message_id, secure_hash = parse_path(request, path)
 
     # Delegate to the media_streamer function to handle streaming
@@ -252,44 +267,43 @@ async def media_streamer(
         web.HTTPException: If any errors occur during processing.
     """
     range_header = request.headers.get("Range")
-    logger.debug(f"Range header received: {range_header}")
+    logger.debug("Range header received: %s", range_header)
 
     # Select the client with the minimal workload
     index, faster_client = select_client()
     if Var.MULTI_CLIENT:
         logger.info(
-            f"Client {index} ({faster_client}) is now serving a request from {request.remote}"
+            "Client %s (%s) is now serving a request from %s", index, faster_client, request.remote
         )
 
     # Use an immutable identifier as cache key
     client_id = id(faster_client)
 
-    # Thread-safe access to the class cache
-    async with class_cache_lock:
-        tg_connect = class_cache.get(client_id)
-        if tg_connect:
-            logger.debug(f"Cache hit for client {index}")
-        else:
-            try:
-                tg_connect = ByteStreamer(faster_client)
-                class_cache[client_id] = tg_connect
-                logger.debug(f"Created new ByteStreamer for client {index}")
-            except Exception as e:
-                logger.error(
-                    f"Failed to create ByteStreamer for client {index}: {e}",
-                    exc_info=True
-                )
-                raise web.HTTPInternalServerError(text="Failed to initialize media stream.")
+    # Lookup and creation do not await, so a miss cannot race another request
+    tg_connect = class_cache.get(client_id)
+    if tg_connect:
+        logger.debug("Cache hit for client %s", index)
+    else:
+        try:
+            tg_connect = ByteStreamer(faster_client)
+            class_cache[client_id] = tg_connect
+            logger.debug("Created new ByteStreamer for client %s", index)
+        except Exception as e:
+            logger.error(
+                f"Failed to create ByteStreamer for client {index}: {e}",
+                exc_info=True
+            )
+            raise web.HTTPInternalServerError(text="Failed to initialize media stream.")
 
     # Retrieve file properties
     try:
         file_id = await tg_connect.get_file_properties(message_id)
-        logger.debug(f"Retrieved file properties for message ID {message_id}: {file_id}")
+        logger.debug("Retrieved file properties for message ID %s: %s", message_id, file_id)
     except InvalidHash:
-        logger.warning(f"Invalid secure hash for message with ID {message_id}")
+        logger.warning("Invalid secure hash for message with ID %s", message_id)
         raise web.HTTPForbidden(text="Invalid secure hash.")
     except FileNotFound as e:
-        logger.warning(f"File not found for message ID {message_id}: {e}")
+        logger.warning("File not found for message ID %s: %s", message_id, e)
         raise web.HTTPNotFound(text="Requested file not found.")
     except Exception as e:
         logger.error(
@@ -300,11 +314,11 @@ async def media_streamer(
 
     # Validate the secure hash
     if file_id.unique_id[:SECURE_HASH_LENGTH] != secure_hash:
-        logger.warning(f"Invalid secure hash for message with ID {message_id}")
+        logger.warning("Invalid secure hash for message with ID %s", message_id)
         raise web.HTTPForbidden(text="Invalid secure hash.")
 
     file_size = file_id.file_size
-    logger.debug(f"File size: {file_size}")
+    logger.debug("File size: %s", file_size)
 
     if file_size == 0:
         logger.warning("File size is zero; cannot process range request.")
@@ -330,11 +344,11 @@ async def media_streamer(
                 until_bytes = file_size - 1
             else:
                 # Invalid Range: no start and no end
-                logger.warning(f"Invalid Range header format: {range_header}")
+                logger.warning("Invalid Range header format: %s", range_header)
                 raise web.HTTPBadRequest(text="Invalid Range header.")
-            logger.debug(f"Handling range from {from_bytes} to {until_bytes}")
+            logger.debug("Handling range from %s to %s", from_bytes, until_bytes)
         else:
-            logger.warning(f"Invalid Range header format: {range_header}")
+            logger.warning("Invalid Range header format: %s", range_header)
             raise web.HTTPBadRequest(text="Invalid Range header.")
     else:
         from_bytes = 0
@@ -348,8 +362,8 @@ async def media_streamer(
         or until_bytes < from_bytes
     ):
         logger.warning(
-            f"Requested Range Not Satisfiable: from_bytes={from_bytes}, "
-            f"until_bytes={until_bytes}, file_size={file_size}"
+            "Requested Range Not Satisfiable: from_bytes=%s, until_bytes=%s, file_size=%s",
+            from_bytes, until_bytes, file_size
         )
         raise web.HTTPRequestRangeNotSatisfiable(
             headers={"Content-Range": f"bytes */{file_size}"}
@@ -366,15 +380,16 @@ async def media_streamer(
     part_count = ((until_bytes - offset) // chunk_size) + 1
 
     logger.debug(
-        f"Streaming parameters - offset: {offset}, first_part_cut: {first_part_cut}, "
-        f"last_part_cut: {last_part_cut}, part_count: {part_count}, chunk_size: {chunk_size}"
+        "Streaming parameters - offset: %s, first_part_cut: %s, "
+        "last_part_cut: %s, part_count: %s, chunk_size: %s",
+        offset, first_part_cut, last_part_cut, part_count, chunk_size
     )
 
     # Determine MIME type and file name
     mime_type = file_id.mime_type or "application/octet-stream"
     file_name = (
         file_id.file_name
-        or f"{secrets.token_hex(2)}{mimetypes.guess_extension(mime_type) or '.unknown'}"
+        or f"{fallback_name_tag()}{mimetypes.guess_extension(mime_type) or '.unknown'}"
     )
     # Escape quotes in filename
     file_name_escaped = file_name.replace('"', '\\"')
@@ -0,0 +1,58 @@
+# Thunder/utils/background.py
+
+import asyncio
+from typing import Coroutine, Set
+
+from Thunder.utils.logger import logger
+
+# Strong references to running background tasks so they are not garbage collected mid-flight
+background_tasks: Set[asyncio.Task] = set()
+
+# Long-running service loops among them, which never finish on their own
+daemon_tasks: Set[asyncio.Task] = set()
+
+
+def _on_task_done(task: asyncio.Task) -> None:
+    """
+    Release a finished background task and log its exception, if any.
+
+    Args:
+        task (asyncio.Task): The finished task.
+    """
+    background_tasks.discard(task)
+    daemon_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task failed: {task.exception()}", exc_info=task.exception())
+
+
+def spawn(coro: Coroutine, daemon: bool = False) -> asyncio.Task:
+    """
+    Run a coroutine as a fire-and-forget background task.
+
+    Args:
+        coro (Coroutine): The coroutine to run.
+        daemon (bool): Whether the coroutine is a service loop that never finishes,
+            so drain_background_tasks does not wait for it.
+
+    Returns:
+        asyncio.Task: The scheduled task.
+    """
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    if daemon:
+        daemon_tasks.add(task)
+    task.add_done_callback(_on_task_done)
+    return task
+
+
+async def drain_background_tasks(timeout: float = 5) -> None:
+    """
+    Wait for pending fire-and-forget tasks, e.g. database writes, before the process exits.
+
+    Args:
+        timeout (float): Maximum number of seconds to wait.
+    """
+    pending = background_tasks - daemon_tasks
+    if pending:
+        logger.info("Waiting for %s background tasks to finish.", len(pending))
+        await asyncio.wait(pending, timeout=timeout)
@@ -1,6 +1,7 @@
 # Thunder/utils/broadcast_helper.py
 
 import asyncio
+import random
 import traceback
 from typing import Tuple
 
@@ -9,13 +10,17 @@ from pyrogram.types import Message
 from Thunder.utils.logger import logger
 
 
-async def send_msg(user_id: int, message: Message) -> Tuple[int, str]:
+async def send_msg(user_id: int, message: Message, retry: bool = True) -> Tuple[int, str]:
     """
     Attempt to forward a message to a specified user and handle exceptions.
 
+    A FloodWait is retried once after the requested wait plus a small jitter;
+    a second FloodWait is reported as a server-side error instead of looping.
+
     Args:
         user_id (int): The user ID to send the message to.
         message (Message): The message to forward.
+        retry (bool): Whether a FloodWait may still be retried.
 
     Returns:
         Tuple[int, str]: A tuple containing the status code and error message (if any).
@@ -29,9 +34,14 @@ async def send_msg(user_id: int, message: Message) -> Tuple[int, str]:
         return 200, None  # Success code
 
     except FloodWait as e:
+        if not retry:
+            error_msg = f"{user_id} : flood wait of {e.value} seconds"
+            logger.warning(error_msg)
+            return 500, error_msg
         logger.warning(f"FloodWait error: sleeping for {e.value} seconds.")
-        await asyncio.sleep(e.value + 1)
-        return await send_msg(user_id, message)  # Retry after wait
+        # Jitter keeps concurrent senders from retrying on the same tick
+        await asyncio.sleep(e.value + random.uniform(0, 1))
+        return await send_msg(user_id, message, retry=False)  # Retry once after wait
 
     except InputUserDeactivated:
         error_msg = f"{user_id} : deactivated"
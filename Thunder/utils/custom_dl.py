@@ -1,8 +1,10 @@
 # Thunder/utils/custom_dl.py
 
 import math
+import random
 import asyncio
-from typing import Dict, Union
+from collections import OrderedDict
+from typing import Union
 from pyrogram import Client, utils, raw
 from pyrogram.session import Session, Auth
 from pyrogram.errors import AuthBytesInvalid, RPCError, FloodWait
@@ -11,6 +13,7 @@ from Thunder.vars import Var
 from Thunder.bot import work_loads
 from Thunder.server.exceptions import FileNotFound
 from .file_properties import get_file_ids
+from Thunder.utils.background import spawn
 from Thunder.utils.logger import logger
 
 class ByteStreamer:
@@ -20,8 +23,8 @@ class ByteStreamer:
     Attributes:
         client (Client): The Pyrogram client instance.
         clean_timer (int): Interval in seconds to clean the cache.
-        cached_file_ids (Dict[int, FileId]): A cache for file properties.
-        cache_lock (asyncio.Lock): An asyncio lock to ensure thread-safe access to the cache.
+        cache_max_size (int): Maximum number of file properties kept in the cache.
+        cached_file_ids (OrderedDict[int, FileId]): An LRU cache for file properties.
     """
 
     def __init__(self, client: Client):
@@ -33,9 +36,9 @@ class ByteStreamer:
         """
         self.client = client
         self.clean_timer = 30 * 60  # Cache clean interval in seconds (30 minutes)
-        self.cached_file_ids: Dict[int, FileId] = {}
-        self.cache_lock = asyncio.Lock()
-        asyncio.create_task(self.clean_cache())
+        self.cache_max_size = 1000
+        self.cached_file_ids: OrderedDict[int, FileId] = OrderedDict()
+        spawn(self.clean_cache(), daemon=True)
         logger.info("ByteStreamer initialized with client.")
 
     async def get_file_properties(self, message_id: int) -> FileId:
@@ -51,16 +54,16 @@ class ByteStreamer:
         Raises:
             FileNotFound: If the file is not found in the channel.
         """
-        logger.debug(f"Fetching file properties for message ID {message_id}.")
-        async with self.cache_lock:
-            file_id = self.cached_file_ids.get(message_id)
+        logger.debug("Fetching file properties for message ID %s.", message_id)
+        # Lock-free hit path: the lookup and reorder do not yield to the event loop
+        file_id = self.cached_file_ids.get(message_id)
+        if file_id:
+            # Mark as most recently used
+            self.cached_file_ids.move_to_end(message_id)
         
         if not file_id:
-            logger.debug(f"File ID for message {message_id} not found in cache, generating...")
+            logger.debug("File ID for message %s not found in cache, generating...", message_id)
             file_id = await self.generate_file_properties(message_id)
-            async with self.cache_lock:
-                self.cached_file_ids[message_id] = file_id
-            logger.info(f"Cached new file properties for message ID {message_id}.")
         
         return file_id
 
@@ -77,16 +80,20 @@ class ByteStreamer:
         Raises:
             FileNotFound: If the file is not found.
         """
-        logger.debug(f"Generating file properties for message ID {message_id}.")
+        logger.debug("Generating file properties for message ID %s.", message_id)
         file_id = await get_file_ids(self.client, Var.BIN_CHANNEL, message_id)
         
         if not file_id:
-            logger.warning(f"Message ID {message_id} not found in the channel.")
+            logger.warning("Message ID %s not found in the channel.", message_id)
             raise FileNotFound(f"File with message ID {message_id} not found.")
         
-        async with self.cache_lock:
-            self.cached_file_ids[message_id] = file_id
-        logger.info(f"Generated and cached file properties for message ID {message_id}.")
+        # No await between insert and eviction, so no lock is needed
+        self.cached_file_ids[message_id] = file_id
+        self.cached_file_ids.move_to_end(message_id)
+        # Evict the least recently used entries beyond the size limit
+        while len(self.cached_file_ids) > self.cache_max_size:
+            self.cached_file_ids.popitem(last=False)
+        logger.info("Generated and cached file properties for message ID %s.", message_id)
         
         return file_id
 
@@ -124,7 +131,7 @@ class ByteStreamer:
                         break
                     except AuthBytesInvalid:
                         logger.debug(
-                            f"Invalid authorization bytes for DC {file_id.dc_id}"
+                            "Invalid authorization bytes for DC %s", file_id.dc_id
                         )
                         continue
                 else:
@@ -139,10 +146,10 @@ class ByteStreamer:
                     is_media=True,
                 )
                 await media_session.start()
-            logger.debug(f"Created media session for DC {file_id.dc_id}")
+            logger.debug("Created media session for DC %s", file_id.dc_id)
             client.media_sessions[file_id.dc_id] = media_session
         else:
-            logger.debug(f"Using cached media session for DC {file_id.dc_id}")
+            logger.debug("Using cached media session for DC %s", file_id.dc_id)
         return media_session
 
     @staticmethod
@@ -160,7 +167,7 @@ class ByteStreamer:
         Returns:
             Union[InputPhotoFileLocation, InputDocumentFileLocation, InputPeerPhotoFileLocation]: The location object.
         """
-        logger.debug(f"Determining location for file type {file_id.file_type}.")
+        logger.debug("Determining location for file type %s.", file_id.file_type)
         file_type = file_id.file_type
 
         if file_type == FileType.CHAT_PHOTO:
@@ -196,7 +203,7 @@ class ByteStreamer:
                 file_reference=file_id.file_reference,
                 thumb_size=file_id.thumbnail_size,
             )
-        logger.debug(f"Location determined for file ID {file_id.media_id}.")
+        logger.debug("Location determined for file ID %s.", file_id.media_id)
         return location
 
     async def yield_file(
@@ -226,7 +233,7 @@ class ByteStreamer:
         """
         client = self.client
         work_loads[index] += 1
-        logger.debug(f"Starting to yield file with client index {index}.")
+        logger.debug("Starting to yield file with client index %s.", index)
 
         media_session = await self.generate_media_session(client, file_id)
         current_part = 1
@@ -267,7 +274,7 @@ class ByteStreamer:
             logger.error(f"Error while yielding file: TimeoutError or AttributeError encountered.")
             pass
         finally:
-            logger.debug(f"Finished yielding file with {current_part} parts.")
+            logger.debug("Finished yielding file with %s parts.", current_part)
             work_loads[index] -= 1
 
     async def clean_cache(self) -> None:
@@ -275,7 +282,7 @@ class ByteStreamer:
         Periodically clean the cache of stored file IDs.
         """
         while True:
-            await asyncio.sleep(self.clean_timer)
-            async with self.cache_lock:
-                self.cached_file_ids.clear()
+            # Jitter so the per-client ByteStreamers do not all clear at once
+            await asyncio.sleep(self.clean_timer * random.uniform(0.95, 1.05))
+            self.cached_file_ids.clear()
             logger.debug("Cache cleaned.")
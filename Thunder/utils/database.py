@@ -4,6 +4,8 @@ import datetime
 from typing import Optional
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import DuplicateKeyError
+from Thunder.utils.logger import logger
 
 
 class Database:
@@ -22,6 +24,32 @@ class Database:
         self._client = motor.motor_asyncio.AsyncIOMotorClient(uri)
         self.db = self._client[database_name]
         self.col: AsyncIOMotorCollection = self.db.users
+        self.links: AsyncIOMotorCollection = self.db.links
+
+    async def ensure_indexes(self, links_ttl: int = 86400):
+        """
+        Create the indexes used by the user and link lookups.
+
+        Args:
+            links_ttl (int): Seconds after which MongoDB expires stored links.
+        """
+        indexes = (
+            (self.col, 'id', {'unique': True}),
+            (self.links, 'file_unique_id', {'unique': True}),
+            (self.links, 'created_at', {'expireAfterSeconds': links_ttl}),
+        )
+        # Each index is created on its own so one failure does not skip the others
+        for collection, key, options in indexes:
+            try:
+                await collection.create_index(key, **options)
+            except DuplicateKeyError as e:
+                logger.error(
+                    "Cannot create unique index on %s.%s: the collection already holds "
+                    "duplicate values, remove them and restart to enable it: %s",
+                    collection.name, key, e
+                )
+            except Exception as e:
+                logger.error("Failed to create index on %s.%s: %s", collection.name, key, e, exc_info=True)
 
     def new_user(self, user_id: int) -> dict:
         """
@@ -35,19 +63,29 @@ class Database:
         """
         return {
             'id': user_id,
-            'join_date': datetime.datetime.utcnow()
+            'join_date': datetime.datetime.now(datetime.timezone.utc)
         }
 
-    async def add_user(self, user_id: int):
+    async def add_user(self, user_id: int) -> bool:
         """
-        Add a new user to the database.
+        Add a new user to the database if they do not exist yet.
+
+        Known users only cost a read. The unique index on 'id' settles concurrent
+        inserts for the same user, so only one caller sees the user as new.
 
         Args:
             user_id (int): The user ID.
+
+        Returns:
+            bool: True if the user was newly added, False if they already existed.
         """
-        if not await self.is_user_exist(user_id):
-            user = self.new_user(user_id)
-            await self.col.insert_one(user)
+        if await self.is_user_exist(user_id):
+            return False
+        try:
+            await self.col.insert_one(self.new_user(user_id))
+        except DuplicateKeyError:
+            return False
+        return True
 
     async def add_user_pass(self, user_id: int, ag_pass: str):
         """
@@ -57,8 +95,11 @@ class Database:
             user_id (int): The user ID.
             ag_pass (str): The password to set.
         """
-        await self.add_user(user_id)
-        await self.col.update_one({'id': user_id}, {'$set': {'ag_p': ag_pass}})
+        await self.col.update_one(
+            {'id': user_id},
+            {'$set': {'ag_p': ag_pass}, '$setOnInsert': self.new_user(user_id)},
+            upsert=True
+        )
 
     async def get_user_pass(self, user_id: int) -> Optional[str]:
         """
@@ -98,12 +139,12 @@ class Database:
 
     async def get_all_users(self):
         """
-        Retrieve all users.
+        Retrieve the IDs of all users.
 
         Returns:
-            AsyncIOMotorCursor: A cursor to iterate over users.
+            AsyncIOMotorCursor: A cursor to iterate over users, projected to the 'id' field.
         """
-        all_users = self.col.find({})
+        all_users = self.col.find({}, {'_id': 0, 'id': 1})
         return all_users
 
     async def delete_user(self, user_id: int):
@@ -114,3 +155,30 @@ class Database:
             user_id (int): The user ID.
         """
         await self.col.delete_one({'id': user_id})
+
+    async def get_links(self, file_unique_id: str) -> Optional[dict]:
+        """
+        Retrieve the links stored for a file.
+
+        Args:
+            file_unique_id (str): The file's unique ID.
+
+        Returns:
+            Optional[dict]: The stored links document if found, else None.
+        """
+        return await self.links.find_one({'file_unique_id': file_unique_id}, {'_id': 0})
+
+    async def save_links(self, file_unique_id: str, links: dict):
+        """
+        Store the links generated for a file, replacing any older ones.
+
+        Args:
+            file_unique_id (str): The file's unique ID.
+            links (dict): The BIN_CHANNEL the links point into, the media name,
+                media size, stream link and online link.
+        """
+        await self.links.update_one(
+            {'file_unique_id': file_unique_id},
+            {'$set': {**links, 'created_at': datetime.datetime.now(datetime.timezone.utc)}},
+            upsert=True
+        )
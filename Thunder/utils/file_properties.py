@@ -1,12 +1,27 @@
 # Thunder/utils/file_properties.py
 
+from functools import lru_cache
+from urllib.parse import quote, quote_plus
 from pyrogram import Client
+from pyrogram.enums import MessageMediaType
 from pyrogram.types import Message
 from pyrogram.file_id import FileId
 from Thunder.server.exceptions import FileNotFound
 from Thunder.utils.logger import logger
 from typing import Any, Optional
 
+# Message attribute holding the file for each media type
+MEDIA_ATTRS = {
+    MessageMediaType.AUDIO: "audio",
+    MessageMediaType.DOCUMENT: "document",
+    MessageMediaType.PHOTO: "photo",
+    MessageMediaType.STICKER: "sticker",
+    MessageMediaType.ANIMATION: "animation",
+    MessageMediaType.VIDEO: "video",
+    MessageMediaType.VOICE: "voice",
+    MessageMediaType.VIDEO_NOTE: "video_note",
+}
+
 
 def get_media_from_message(message: Message) -> Optional[Any]:
     """
@@ -18,58 +33,29 @@ def get_media_from_message(message: Message) -> Optional[Any]:
     Returns:
         Optional[Any]: The media object if found, else None.
     """
-    media_types = (
-        "audio",
-        "document",
-        "photo",
-        "sticker",
-        "animation",
-        "video",
-        "voice",
-        "video_note",
-    )
-
-    for attr in media_types:
-        media = getattr(message, attr, None)
-        if media:
-            logger.debug(f"Media found in message: {attr}")
-            return media
-    logger.debug("No media types found in the message.")
-    return None
-
-
-def parse_file_id(message: Message) -> Optional[FileId]:
-    """
-    Extracts and decodes the file ID from a message.
-
-    Args:
-        message (Message): The message containing the media.
-
-    Returns:
-        Optional[FileId]: The decoded FileId object if successful, else None.
-    """
-    media = get_media_from_message(message)
+    # message.media names the populated attribute, so there is no need to probe each one
+    attr = MEDIA_ATTRS.get(message.media)
+    media = getattr(message, attr, None) if attr else None
     if media:
-        return FileId.decode(media.file_id)
-    logger.warning(f"No media found in message: {message.message_id}")
+        logger.debug("Media found in message: %s", attr)
+        return media
+    logger.debug("No media types found in the message.")
     return None
 
 
-def parse_file_unique_id(message: Message) -> Optional[str]:
+@lru_cache(maxsize=2048)
+def quote_file_name(file_name: str, plus: bool = False) -> str:
     """
-    Extracts the unique file ID if available.
+    Percent-encode a file name for use in a link, memoized for repeated names.
 
     Args:
-        message (Message): The message containing the media.
+        file_name (str): The file name to encode.
+        plus (bool): Encode with quote_plus instead of quote.
 
     Returns:
-        Optional[str]: The unique file ID if found, else None.
+        str: The encoded file name.
     """
-    media = get_media_from_message(message)
-    if media:
-        return media.file_unique_id
-    logger.warning("No media found in message for unique ID extraction.")
-    return None
+    return quote_plus(file_name) if plus else quote(file_name)
 
 
 async def get_file_ids(client: Client, chat_id: int, message_id: int) -> FileId:
@@ -98,15 +84,14 @@ async def get_file_ids(client: Client, chat_id: int, message_id: int) -> FileId:
             logger.error("No media in message; cannot fetch file IDs.")
             raise FileNotFound("No media in message.")
 
-        file_unique_id = parse_file_unique_id(message)
-        file_id = parse_file_id(message)
+        # Decode from the media object found above instead of rescanning the message
+        file_id = FileId.decode(media.file_id)
 
         # Add extra details to FileId
-        if file_id:
-            file_id.file_size = getattr(media, "file_size", 0)
-            file_id.mime_type = getattr(media, "mime_type", "")
-            file_id.file_name = getattr(media, "file_name", "")
-            file_id.unique_id = file_unique_id
+        file_id.file_size = getattr(media, "file_size", 0)
+        file_id.mime_type = getattr(media, "mime_type", "")
+        file_id.file_name = getattr(media, "file_name", "")
+        file_id.unique_id = media.file_unique_id
 
         return file_id
 
@@ -0,0 +1,11 @@
+# Thunder/utils/messages.py
+
+# Reply with the generated links, shared by every handler that sends them
+LINKS_READY_MSG = (
+    "🔗 **Your Links are Ready!**\n\n"
+    "📄 **File Name:** `{media_name}`\n"
+    "📂 **File Size:** `{media_size}`\n\n"
+    "📥 **Download Link:**\n`{online_link}`\n\n"
+    "🖥️ **Watch Now:**\n`{stream_link}`\n\n"
+    "⏰ **Note:** Links are available as long as the bot is active."
+)
@@ -0,0 +1,50 @@
+# Thunder/utils/ratelimit.py
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    An asyncio token bucket that paces outgoing requests to a steady rate.
+
+    Attributes:
+        rate (float): Number of tokens added per second.
+        burst (int): Maximum number of tokens the bucket can hold.
+        tokens (float): Number of tokens currently available.
+        updated_at (float): Monotonic timestamp of the last refill.
+    """
+
+    def __init__(self, rate: float = 28, burst: int = 20):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate (float): Number of tokens added per second.
+            burst (int): Maximum number of tokens the bucket can hold.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        """
+        Add the tokens accumulated since the last refill, capped at the burst size.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available and consume it.
+
+        The token is reserved up front, so the balance may go negative; each caller
+        then sleeps until its own reservation is covered, keeping waiters in FIFO
+        order without a lock.
+        """
+        self._refill()
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
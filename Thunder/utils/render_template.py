@@ -27,8 +27,8 @@ async def render_page(id: int, secure_hash: str) -> str:
     """
     file_data = await get_file_ids(StreamBot, int(Var.BIN_CHANNEL), id)
     if file_data.unique_id[:6] != secure_hash:
-        logger.debug(f'Link hash: {secure_hash} - Expected hash: {file_data.unique_id[:6]}')
-        logger.debug(f"Invalid hash for message with ID {id}")
+        logger.debug('Link hash: %s - Expected hash: %s', secure_hash, file_data.unique_id[:6])
+        logger.debug("Invalid hash for message with ID %s", id)
         raise InvalidHash
 
     src = urllib.parse.urljoin(Var.URL, f'{secure_hash}{str(id)}')
@@ -66,6 +66,8 @@ class Var:
     # SSL configuration
     HAS_SSL: bool = str2bool(os.getenv('HAS_SSL', 'True'))
     URL: str = f"https://{FQDN}/" if HAS_SSL else f"http://{FQDN}/"
+    # Base URL for generated links, without the trailing slash
+    BASE_URL: str = URL.rstrip("/")
 
     # Database URL
     DATABASE_URL: str = os.getenv('DATABASE_URL', '')